@@ -66,6 +66,16 @@ class Complexes(Base):
     sources = Column(ARRAY(String))
     references = Column(String)  # Could be array
     identifiers = Column(String)  # Could be array
+    #  Resources and proteins are matched by array overlap (`&&`); GIN indexes
+    #  map each element to its rows, so these filters need no sequential scan.
+    __table_args__ = (
+        Index('ix_complexes_sources', 'sources', postgresql_using = 'gin'),
+        Index(
+            'ix_complexes_components',
+            'components',
+            postgresql_using = 'gin',
+        ),
+    )
 
 
 class Enzsub(Base):
@@ -87,6 +97,10 @@ class Enzsub(Base):
     references = Column(String)
     curation_effort = Column(Integer)
     ncbi_tax_id = Column(Integer)
+    #  Resource filters are array overlaps (`&&`) on `sources`.
+    __table_args__ = (
+        Index('ix_enzsub_sources', 'sources', postgresql_using = 'gin'),
+    )
 
 
 class Interactions(Base):
@@ -143,6 +157,11 @@ class Interactions(Base):
         Index('ix_interactions_source_genesymbol', 'source_genesymbol'),
         Index('ix_interactions_target_genesymbol', 'target_genesymbol'),
         Index('ix_interactions_sources', 'sources', postgresql_using = 'gin'),
+        Index(
+            'ix_interactions_dorothea_level',
+            'dorothea_level',
+            postgresql_using = 'gin',
+        ),
     )
 
 
@@ -169,10 +188,25 @@ class Intercell(Base):
     plasma_membrane_transmembrane = Column(Boolean)
     plasma_membrane_peripheral = Column(Boolean)
     #  The service filters intercell by protein (uniprot/genesymbol), category and source.
+    #  The category index leads with the `DISTINCT ON` key of the summary query
+    #  and includes the rest of its columns, so the summary is an index-only
+    #  scan; category filters use its leading column.
     __table_args__ = (
         Index('ix_intercell_uniprot', 'uniprot'),
         Index('ix_intercell_genesymbol', 'genesymbol'),
-        Index('ix_intercell_category', 'category'),
+        Index(
+            'ix_intercell_category_parent_database',
+            'category',
+            'parent',
+            'database',
+            postgresql_include = [
+                'aspect',
+                'source',
+                'scope',
+                'transmitter',
+                'receiver',
+            ],
+        ),
         Index('ix_intercell_source', 'source'),
     )
 
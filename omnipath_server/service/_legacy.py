@@ -13,27 +13,47 @@
 # https://www.gnu.org/licenses/gpl-3.0.txt
 #
 
-from typing import Any, Literal
+from typing import Any, Literal, NamedTuple
 from collections.abc import Callable, Iterable, Generator, Collection
 import os
 import re
+import sys
 import json
+import types
+import pickle
+import hashlib
+import operator
+import tempfile
+import pathlib as pl
 import functools
-import importlib as imp
+import importlib
 import itertools
+import threading
 import collections
-
-from sqlalchemy import or_, and_, any_, not_, text
+import concurrent.futures
+
+from sqlalchemy import (
+    or_,
+    and_,
+    any_,
+    func,
+    not_,
+    text,
+    select,
+    literal,
+    distinct,
+    union_all,
+)
 from pypath_common import _misc
 from pypath_common import _constants as _const
 from sqlalchemy.orm import Query
 from sqlalchemy.sql.base import ReadOnlyColumnCollection
 from sqlalchemy.sql.schema import Column
-from sqlalchemy.sql.elements import BooleanClauseList
+from sqlalchemy.sql.elements import Label, TextClause, BooleanClauseList
 from sqlalchemy.orm.attributes import InstrumentedAttribute
 from sqlalchemy.dialects.postgresql import array
 
-from omnipath_server import session
+from omnipath_server import session, __version__
 from .. import _log, _connection
 from .._misc import SetEncoder
 from ..schema import _legacy as _schema
@@ -51,6 +71,7 @@ __all__ = [
     'INTERACTION_TYPES',
     'INTERCELL_CAUSALITY',
     'INTERCELL_TOPOLOGY',
+    'IntercellRecord',
     'LICENSE_IGNORE',
     'LICENSE_INVALID',
     'LICENSE_LEVELS',
@@ -64,7 +85,7 @@ __all__ = [
 
 
 LICENSE_IGNORE = 'ignore'
-LICENSE_INVALID = {'composite', 'ignore'}
+LICENSE_INVALID = frozenset({'composite', 'ignore'})
 DEFAULT_LICENSE = 'academic'
 NO_LICENSE = {
     'name': 'No license',
@@ -162,10 +183,60 @@ LICENSE_RANKS = {
 }
 GEN_OF_TUPLES = Generator[tuple, None, None]
 GEN_OF_STR = Generator[str, None, None]
+# lowercase string representations of booleans, to their values
+_BOOL_STR = {
+    **dict.fromkeys(_const.BOOLEAN_TRUE, True),
+    **dict.fromkeys(_const.BOOLEAN_FALSE, False),
+}
+
+
+def _intern(value: Any) -> Any:
+    """
+    Interns strings, leaves any other value unchanged.
+    """
+
+    return sys.intern(value) if isinstance(value, str) else value
+
 
-# TODO: replace with `resources` SQL table
-# to avoid having pypath-omnipath as dependency
-resources_mod = None
+@functools.lru_cache(maxsize = 256)
+def _record_cls(names: tuple[str, ...]) -> type:
+    """
+    Named tuple class for raw records with the given fields.
+
+    Creating a named tuple class compiles its methods, so the classes are
+    reused across requests that select the same columns.
+    """
+
+    return collections.namedtuple('Record', names)
+
+
+class IntercellRecord(NamedTuple):
+    """
+    A record of the intercell summary.
+    """
+
+    category: str
+    parent: str
+    database: str
+    aspect: str
+    source: str
+    scope: str
+    transmitter: bool
+    receiver: bool
+
+
+# the fixed queries of the preprocessing, built only once
+_RE_NUMERIC = re.compile(r'(?:[-\d\.]+|nan|-?inf)')
+_ANNOTATIONS_SUMMARY_QUERY = text(
+    'SELECT source, label, ARRAY_AGG(DISTINCT value) '
+    'FROM annotations GROUP BY source, label;',
+)
+_INTERCELL_SUMMARY_QUERY = text(
+    'SELECT DISTINCT ON (category, parent, database) '
+    f'{", ".join(IntercellRecord._fields)} '
+    'FROM intercell '
+    'ORDER BY category, parent, database;',
+)
 
 
 # class Arg(types.NamedTuple):
@@ -277,6 +348,12 @@ class LegacyService:
                     'is_inhibition',
                 },
             },
+            # rough fraction of the records passing each boolean filter:
+            # the most selective filters come first in the WHERE clause
+            'where_bool_selectivity': {
+                'datasets': .3,
+                'signed': .5,
+            },
             'where_bool_override': {
                 'dorothea': {
                     'dorothea_levels': 'dorothea_level',
@@ -392,6 +469,10 @@ class LegacyService:
                     'rec': 'receiver',
                 },
             },
+            'where_bool_selectivity': {
+                'topology': .3,
+                'causality': .5,
+            },
             'select': {
                 'topology': INTERCELL_TOPOLOGY.__args__,
                 'causality': INTERCELL_CAUSALITY.__args__,
@@ -435,11 +516,20 @@ class LegacyService:
         'enzsub',
         'complexes',
     }
+    # the column with the resource names, it's different across the tables
+    resource_cols = {
+        'interactions': 'sources',
+        'enzsub': 'sources',
+        'complexes': 'sources',
+        'annotations': 'source',
+        'intercell': 'database',
+    }
     dataset2type = {
         'omnipath': 'post_translational',
         'tfregulons': 'transcriptional',
         'dorothea': 'transcriptional',
         'collectri': 'transcriptional',
+        'collectri2': 'transcriptional',
         'tf_target': 'transcriptional',
         'kinaseextra': 'post_translational',
         'ligrecextra': 'post_translational',
@@ -881,16 +971,27 @@ class LegacyService:
         self._connect(con)
 
         self._cached_data = {}
+        self._summary_lock = threading.Lock()
+        self._reset_intercell_summary_cache()
 
         self._preprocess()
 
 
     def _preprocess(self):
+        """
+        Prepares everything the data queries need. The annotations and
+        intercell summaries are built only when first requested, see
+        `_summary`.
+        """
 
+        self._preprocess_columns()
         self._preprocess_args_ref()
+        self._preprocess_where()
+        self._preprocess_where_bool()
+        self._preprocess_where_loops()
+        self._preprocess_where_partners()
+        self._preprocess_resource_cols()
         self._update_resources()
-        self._preprocess_annotations()
-        self._preprocess_intercell()
 
 
     def _reload(self):
@@ -899,11 +1000,44 @@ class LegacyService:
         """
 
         modname = self.__class__.__module__
-        mod = __import__(modname, fromlist = [modname.split('.')[0]])
-        imp.reload(mod)
+        mod = importlib.reload(importlib.import_module(modname))
         new = getattr(mod, self.__class__.__name__)
         setattr(self, '__class__', new)
 
+        # drop the responses memoized by the code before the reload
+        self._reset_resources_caches()
+        self._reset_intercell_summary_cache()
+
+
+    def _reset_resources_caches(self):
+        """
+        Creates the memos of the responses built from the resource metadata,
+        dropping the results memoized before.
+        """
+
+        # keyed by client input (the `datasets` argument of `resources`):
+        # bounded, only the few common combinations stay
+        self._resources_filtered = functools.lru_cache(maxsize = 8)(
+            self._filter_resources,
+        )
+        self._resources_json = functools.lru_cache(maxsize = 8)(
+            self._dump_resources,
+        )
+        self._dataset_sources_cache = {}
+
+
+    def _reset_intercell_summary_cache(self):
+        """
+        Creates the memo of the filtered intercell summaries, dropping the
+        results memoized before.
+        """
+
+        # the summary is static, and clients tend to repeat the same few
+        # filter combinations: keep the filtered results of the recent ones
+        self._intercell_summary_filtered = functools.lru_cache(maxsize = 256)(
+            self._filter_intercell_summary,
+        )
+
 
     def _connect(self, con: _connection.Connection | dict | None = None):
         """
@@ -932,25 +1066,213 @@ class LegacyService:
         self.con = _connection.ensure_con(con)
 
 
+    def _preprocess_columns(self):
+        """
+        Name to column mapping of each data table, so the query builders do
+        not have to walk the table metadata on every request.
+        """
+
+        self._column_by_name = {
+            query_type: {c.name: c for c in self._columns(query_type)}
+            for query_type in self.data_query_types
+        }
+
+
     def _preprocess_args_ref(self):
 
+        # flat per query type view of the parameters used by the argument
+        # processing on every request
+        self._qp = {}
+
         for query_type, param in self.query_param.items():
 
+            self._freeze_param(param)
             param['syn2arg'] = _misc.swap_dict(param.get('arg_synonyms', {}))
+            self._qp[query_type] = types.SimpleNamespace(
+                syn2arg = param['syn2arg'],
+                arg_types = param.get('arg_types', {}),
+                array_args = param.get('array_args', frozenset()),
+                where = param.get('where', {}),
+                where_synonyms = param.get('where_synonyms', {}),
+            )
+
+        # the accepted values of each argument, as sets, for `_check_args`
+        self._args_ref_sets = {
+            query_type: {
+                arg: frozenset(values) if values else None
+                for arg, values in ref.items()
+            }
+            for query_type, ref in self.args_reference.items()
+        }
+
+
+    @staticmethod
+    def _freeze_param(param: dict):
+        """
+        Turns the sets in the parameters of a query type, and those one level
+        deeper in its dicts, into frozensets. These are only read by the
+        request handlers, never modified.
+        """
+
+        for key, value in param.items():
+
+            if isinstance(value, set):
+
+                param[key] = frozenset(value)
+
+            elif isinstance(value, dict):
+
+                for subkey, subvalue in value.items():
+
+                    if isinstance(subvalue, set):
+
+                        value[subkey] = frozenset(subvalue)
+
+
+    def _preprocess_where(self):
+        """
+        Resolves the columns and operator of each `WHERE` argument once, so
+        `_where` has only to look them up.
+        """
+
+        self._where_plan = {}
+
+        for query_type, qp in self._qp.items():
+
+            columns = self._column_by_name[query_type]
+            plan = self._where_plan[query_type] = {}
+
+            for arg, col_op in qp.where.items():
+
+                cols, op, *_ = _misc.to_tuple(col_op) + (None,)
+                plan[arg] = (
+                    tuple(columns[col] for col in cols.split(':')),
+                    op,
+                )
+
+
+    def _preprocess_where_bool(self):
+        """
+        Resolves the boolean filter parameters of each query type once, so
+        `_where_bool` only has to intersect them with the request arguments.
+        """
+
+        self._where_bool_plan = {}
+
+        for query_type, param in self.query_param.items():
+
+            if not (bool_args := param.get('where_bool')):
+
+                continue
+
+            override = param.get('where_bool_override', {})
+            in_override = frozenset(
+                arg
+                for key in override.values()
+                for arg in key
+            )
+            selectivity = param.get('where_bool_selectivity', {})
+            plan = []
+
+            # the arguments used in overrides are processed first, as the
+            # overridden filters build on their clauses; then the most
+            # selective filters first; the sort is stable: filters without
+            # estimate keep their order, at the end
+            for arg, cols in sorted(
+                bool_args.items(),
+                key = lambda arg_cols: (
+                    arg_cols[0] not in in_override,
+                    selectivity.get(arg_cols[0], 1.),
+                ),
+            ):
+
+                cols_map = cols if isinstance(cols, dict) else None
+                valid_cols = frozenset(cols_map.values() if cols_map else cols)
+                plan.append((arg, cols_map, valid_cols))
+
+            self._where_bool_plan[query_type] = (
+                plan,
+                override,
+                in_override,
+                self._column_by_name[query_type],
+            )
+
+
+    def _preprocess_where_loops(self):
+        """
+        Builds the clause excluding self loops once for each query type with
+        partner sides; it is constant, so the same object serves all requests.
+        """
+
+        self._loops_clause = {}
+
+        for query_type, param in self.query_param.items():
+
+            if not (partners := param.get('where_partners')):
+
+                continue
+
+            columns = self._column_by_name[query_type]
+            side_a, side_b = (columns[c] for c in partners['sides'].values())
+            self._loops_clause[query_type] = side_a.op('!=')(side_b)
+
+
+    def _preprocess_where_partners(self):
+        """
+        Resolves the partner side columns (identifier and gene symbol) of
+        each query type once, for `_where_partners`.
+        """
+
+        self._partners_plan = {}
+
+        for query_type, param in self.query_param.items():
+
+            if not (partners := param.get('where_partners')):
+
+                continue
+
+            columns = self._column_by_name[query_type]
+            self._partners_plan[query_type] = (
+                partners['operator'],
+                [
+                    (
+                        side,
+                        (columns[sidecol], columns[f'{sidecol}_genesymbol']),
+                    )
+                    for side, sidecol in partners['sides'].items()
+                ],
+            )
 
 
     def _preprocess_annotations(self):
         """
+        Unique source, label, value triplets of the annotations, with the
+        values of numeric labels replaced by `<numeric>`, the values of other
+        labels joined by `#`.
         """
 
         _log('Preprocessing annotations.')
 
-        query = "SELECT source, label, ARRAY_AGG(DISTINCT value) FROM " \
-        "annotations GROUP BY source, label;"
-
-        self._cached_data["annotations_summary"] = list(
-            self.con.execute(text(query)),
-        )
+        # resource names and labels repeat across the records: interned, all
+        # records refer to a single copy of each; the values are classified
+        # here, once, instead of on each request; the summary is stored only
+        # when complete, as `_summary` reads it without the lock
+        self._cached_data["annotations_summary"] = {
+            (
+                _intern(source),
+                _intern(label),
+                (
+                    '<numeric>'
+                        if all(map(_RE_NUMERIC.match, values)) else
+                    '#'.join(values)
+                ),
+            )
+            for source, label, values in self._summary_query(
+                'annotations_summary',
+                'annotations',
+                _ANNOTATIONS_SUMMARY_QUERY,
+            )
+        }
 
 
     def _preprocess_intercell(self):
@@ -959,49 +1281,242 @@ class LegacyService:
 
         _log('Preprocessing intercell.')
 
-        record = collections.namedtuple(
-            'intercell_records', [
-                'category',
-                'parent',
-                'database',
-                'aspect',
-                'source',
-                'scope',
-                'transmitter',
-                'receiver',
-            ],
+        records = [
+            IntercellRecord._make(map(_intern, rec))
+            for rec in self._summary_query(
+                'intercell_summary',
+                'intercell',
+                _INTERCELL_SUMMARY_QUERY,
+            )
+        ]
+        # published last: `_summary` reads it without the lock
+        self._cached_data["intercell_summary"] = records
+
+
+    def _summary(self, name: str, preprocess: Callable[[], None]) -> list:
+        """
+        A cached summary, built by its preprocessing method on first use.
+
+        Each summary is an aggregation over a full table: building it only when
+        the endpoint is first called saves the work at start-up for every
+        worker that never serves it. The lock makes sure concurrent first
+        requests build it only once.
+
+        The cached summary is read without the lock: the preprocessing
+        method must store it in the cached data as its very last step, after
+        anything derived from it is in place.
+
+        Args:
+            name:
+                Key of the summary in the cached data.
+            preprocess:
+                Method that builds the summary.
+        """
+
+        if (summary := self._cached_data.get(name)) is None:
+
+            with self._summary_lock:
+
+                if name not in self._cached_data:
+
+                    preprocess()
+
+                summary = self._cached_data[name]
+
+        return summary
+
+
+    def _summary_query(
+            self,
+            name: str,
+            table: str,
+            query: TextClause,
+    ) -> list[tuple]:
+        """
+        Executes a summary query, or loads its result from the on-disk cache.
+
+        Args:
+            name:
+                Name of the summary, used in the cache file name.
+            table:
+                The table the summary is built from.
+            query:
+                The summary query.
+
+        Returns:
+            The records of the summary as tuples.
+        """
+
+        return self._disk_cached(
+            name,
+            (table,),
+            lambda: [tuple(rec) for rec in self.con.execute(query)],
+            key = query.text,
         )
 
-        query = (
-            "SELECT DISTINCT ON (category, parent, database) "
-            f"{', '.join(record._fields)} "
-            "FROM intercell;"
+
+    def _disk_cached(
+            self,
+            name: str,
+            tables: Iterable[str],
+            build: Callable[[], Any],
+            key: str = '',
+    ) -> Any:
+        """
+        Builds a value from the database, or loads it from the on-disk cache.
+
+        The cache is used only if the `legacy_disk_cache` config option points
+        to a directory (`legacy_summary_cache` is its deprecated old name).
+        The cache files are keyed by `key`, the version of this package and
+        the row count and highest id of each table the value is built from, so
+        reloading any of the tables invalidates them.
+
+        Args:
+            name:
+                Name of the value, used in the cache file name.
+            tables:
+                The tables the value is built from.
+            build:
+                Function building the value.
+            key:
+                Further data identifying the value, e.g. the query.
+
+        Returns:
+            The value, built or loaded from the cache.
+        """
+
+        cachedir = session.config.get('legacy_disk_cache', default = None)
+
+        if not cachedir:
+
+            # the option used to be called `legacy_summary_cache`
+            cachedir = session.config.get(
+                'legacy_summary_cache',
+                default = None,
+            )
+
+            if cachedir:
+
+                _log(
+                    'Config option `legacy_summary_cache` is deprecated, '
+                    'please use `legacy_disk_cache` instead.',
+                )
+
+        if not cachedir:
+
+            return build()
+
+        tokens = []
+
+        for table in tables:
+
+            [token] = self.con.execute(
+                text(f'SELECT count(*), max(id) FROM {table};'),
+            )
+            tokens.append(tuple(token))
+
+        digest = hashlib.sha1(
+            f'{__version__}{key}{tokens}'.encode(),
+        ).hexdigest()
+        path = pl.Path(cachedir).expanduser() / f'{name}_{digest}.pickle'
+
+        if path.exists():
+
+            try:
+
+                with open(path, 'rb') as fp:
+
+                    _log(f'Loading `{name}` from `{path}`.')
+
+                    return pickle.load(fp)
+
+            # a file left by an incompatible version can fail in many ways
+            # (e.g. `AttributeError` for a renamed class): rebuild in any case
+            except Exception as e:
+
+                _log(f'Failed to load `{name}` from `{path}`: {e}')
+
+        result = build()
+        tmp_path = None
+
+        try:
+
+            path.parent.mkdir(parents = True, exist_ok = True)
+
+            # workers start together: write to a temporary file and move it
+            # in place, so no worker ever reads a partially written pickle
+            with tempfile.NamedTemporaryFile(
+                dir = path.parent,
+                prefix = f'.{name}_',
+                suffix = '.tmp',
+                delete = False,
+            ) as fp:
+
+                tmp_path = fp.name
+                pickle.dump(result, fp)
+
+            os.replace(tmp_path, path)
+
+            _log(f'Saved `{name}` to `{path}`.')
+
+        except (OSError, pickle.PicklingError) as e:
+
+            _log(f'Failed to save `{name}` to `{path}`: {e}')
+
+            if tmp_path:
+
+                pl.Path(tmp_path).unlink(missing_ok = True)
+
+        return result
+
+
+    def _filter_intercell_summary(
+            self,
+            filters: tuple[tuple[str, frozenset], ...],
+    ) -> tuple[tuple[str, str, str], ...]:
+        """
+        Category, parent, database triplets of the intercell summary records
+        matching all the filters.
+
+        Args:
+            filters:
+                Pairs of record field names and accepted values.
+        """
+
+        # the field names resolved to positions once, not for each record
+        tests = tuple(
+            (IntercellRecord._fields.index(field), values)
+            for field, values in filters
         )
 
-        self._cached_data["intercell_summary"] = [
-            record(*x) for x in self.con.execute(text(query))
-        ]
+        return tuple(
+            x[:3]
+            for x in self._cached_data["intercell_summary"]
+            if all(x[i] in values for i, values in tests)
+        )
 
 
-    def _resource_col(self, query_type: QUERY_TYPES) -> str:
+    def _preprocess_resource_cols(self):
         """
-        Name of the column with resource names for each query_type.
+        Checks that the resource columns of the data query types exist in
+        their tables, so a schema change can not go unnoticed.
         """
 
-        cols = {c.name: c for c in self._columns(query_type)}
+        if __debug__:
 
-        # finding out what is the name of the column with the resources
-        # as this is different across the tables
-        for colname, argname in (
-            ('database', 'databases'),
-            ('sources', 'databases'),
-            ('source', 'databases'),
-            ('category', 'categories'),
-        ):
+            for query_type, colname in self.resource_cols.items():
+
+                assert colname in self._column_by_name[query_type], (
+                    f'No column `{colname}` in table `{query_type}`.'
+                )
 
-            if colname in cols:
 
-                return colname
+    def _resource_col(self, query_type: QUERY_TYPES) -> str:
+        """
+        Name of the column with resource names for each query_type.
+        """
+
+        return self.resource_cols.get(query_type)
 
 
     def _resource_prefix_cols(self, query_type: QUERY_TYPES) -> list[str]:
@@ -1018,85 +1533,147 @@ class LegacyService:
         return _misc.to_list(_prefix_cols.get(query_type))
 
 
-    def _update_resources(self):
+    def _resource_expr(self, query_type: str) -> Label:
         """
-        Compiles list of all the different resources across all databases.
+        The resources of a table, one for each row of the result: array
+        resource columns are unnested.
         """
 
-        _log('Updating resource information.')
+        cols = self._column_by_name[query_type]
+        res_col = cols[self._resource_col(query_type)]
+
+        return (
+            func.unnest(res_col)
+                if self._isarray(res_col) else
+            res_col
+        ).label('resource')
 
-        self._resources_meta = collections.defaultdict(dict)
+
+    def _collect_resources_meta(self) -> dict[str, dict]:
+        """
+        Collects the license, datasets and query types of all resources,
+        from the data tables and the licenses table.
+        """
+
+        resources_meta = collections.defaultdict(dict)
 
         _log('Loading license information.')
 
-        license_query = "SELECT * FROM licenses;"
-        license_cols = [c.name for c in self._columns('licenses')]
+        # selecting the columns by name, the key first: no need to slice the
+        # rows, and we don't depend on the column order of the table
+        license_cols = [
+            c.name
+            for c in self._columns('licenses')
+            if c.name not in {'id', 'resource'}
+        ]
+        queries = {
+            'licenses': text(
+                f"SELECT resource, {', '.join(license_cols)} FROM licenses;",
+            ),
+        }
+
+        # the resources of the tables other than interactions (that one has
+        # its datasets queried together with the resources, see below), all
+        # in one round trip
+        queries['resources'] = union_all(*(
+            select(
+                literal(query_type).label('query_type'),
+                self._resource_expr(query_type),
+            ).distinct()
+            for query_type in sorted(self.data_query_types)
+            if query_type != 'interactions'
+        ))
+
+        # a single scan for the interaction resources and all the datasets:
+        # one row for each resource, with a flag for each dataset telling if
+        # the resource has any record in it
+        cols = self._column_by_name['interactions']
+        dataset_cols = [d for d in sorted(self.datasets_) if d in cols]
+        res = select(
+            self._resource_expr('interactions'),
+            *(cols[d] for d in dataset_cols),
+        ).subquery('res')
+        queries['datasets'] = select(
+            res.c.resource,
+            *(func.bool_or(res.c[d]) for d in dataset_cols),
+        ).group_by(res.c.resource)
+
+        # one row and one set for each intercell database, rather than a row
+        # for each of their categories
+        cols = self._column_by_name['intercell']
+        queries['categories'] = select(
+            cols['database'],
+            func.array_agg(distinct(cols['category'])),
+        ).where(
+            cols['scope'] == 'generic',
+        ).group_by(cols['database'])
+
+        # the queries are independent, and each scans a different table: run
+        # them at the same time, each on its own connection from the pool
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers = len(queries),
+        ) as pool:
+
+            rows = dict(zip(
+                queries,
+                pool.map(lambda q: list(self.con.execute(q)), queries.values()),
+            ))
+
         licenses = {
-            l[1]: dict(zip(license_cols[2:], l[2:]))
-            for l in self.con.execute(text(license_query))
+            resource: dict(zip(license_cols, values))
+            for resource, *values in rows['licenses']
         }
+        resources_by_type = collections.defaultdict(set)
+
+        for query_type, resource in rows['resources']:
+
+            resources_by_type[query_type].add(resource)
 
         for query_type in self.data_query_types:
 
             datasets = {}
             categories = collections.defaultdict(set)
-            cols = {c.name: c for c in self._columns(query_type)}
-            colname = self._resource_col(query_type)
-
-            unnest = (
-                ('unnest(', ')')
-                    if self._isarray(cols[colname]) else
-                ('', '')
-            )
-
-            query = f'SELECT DISTINCT {colname.join(unnest)} FROM {query_type};'
-            resources = {x[0] for x in self.con.execute(text(query))}
 
             if query_type == 'interactions':
 
-                for dataset in self.datasets_:
-
-                    if dataset not in cols.keys():
-
-                        continue
-
-                    query = (
-                        f'SELECT DISTINCT {colname.join(unnest)} '
-                        f'FROM {query_type} WHERE {dataset};'
-                    )
-                    datasets[dataset] = {
-                        x[0]
-                        for x in self.con.execute(text(query))
+                # datasets by resource, as below we look them up by resource
+                datasets = {
+                    resource: {
+                        dataset
+                        for dataset, flag in zip(dataset_cols, flags)
+                        if flag
                     }
+                    for resource, *flags in rows['datasets']
+                }
+                resources = set(datasets)
 
-            elif query_type == 'intercell':
+            else:
 
-                query = (
-                    f'SELECT category, database '
-                    f"FROM {query_type} WHERE scope = 'generic' "
-                    f'GROUP BY category, database;'
-                )
+                resources = resources_by_type[query_type]
 
-                for category, database in self.con.execute(text(query)):
+            if query_type == 'intercell':
 
-                    categories[database].add(category)
+                for database, db_categories in rows['categories']:
 
-            for db in resources:
+                    categories[database] = set(db_categories)
 
-                if db not in licenses:
+            for db in resources:
 
-                    licenses[db] = NO_LICENSE.copy()
+                # the license dicts are never modified, so resources without
+                # a license of their own can share them instead of copying
+                lic = licenses.get(db, NO_LICENSE)
 
                 if (
-                    licenses[db]['purpose'] in LICENSE_INVALID and
+                    lic['purpose'] in LICENSE_INVALID and
                     '_' in db and
                     (component_db := db.split('_')[0]) in licenses
                 ):
 
-                    licenses[db] = licenses[component_db].copy()
+                    lic = licenses[component_db]
 
+                licenses[db] = lic
 
-                if licenses[db]['purpose'] == LICENSE_IGNORE:
+                if lic['purpose'] == LICENSE_IGNORE:
 
                     msg = (
                         f'No license for resource `{db}`. '
@@ -1106,50 +1683,88 @@ class LegacyService:
                     _log(msg)
 
 
-                self._resources_meta[db]['license'] = licenses[db]
+                resources_meta[db]['license'] = lic
 
                 qt_data = {}
 
                 if datasets:
 
-                    qt_data['datasets'] = {
-                        k
-                        for k, v in datasets.items()
-                        if db in v
-                    }
+                    qt_data['datasets'] = datasets[db]
 
                 if categories:
 
                     qt_data['categories'] = categories[db]
 
-                if 'queries' not in self._resources_meta[db]:
+                if 'queries' not in resources_meta[db]:
 
-                    self._resources_meta[db]['queries'] = {}
-                    self._resources_meta[db]['datasets'] = set()
+                    resources_meta[db]['queries'] = {}
+                    resources_meta[db]['datasets'] = set()
 
-                self._resources_meta[db]['queries'][query_type] = qt_data
-                self._resources_meta[db]['datasets'] |= (
+                resources_meta[db]['queries'][query_type] = qt_data
+                resources_meta[db]['datasets'] |= (
                     qt_data.get('datasets', set())
                 )
 
         composite_resources = {
             res
-            for res, info in self._resources_meta.items()
+            for res, info in resources_meta.items()
             if info['license']['purpose'] == 'composite'
         }
-        components = {
-            cres: {
-                res for res in self._resources_meta.keys()
-                if res.endswith(cres)
-            }
-            for cres in composite_resources
-        }
+        components = {cres: set() for cres in composite_resources}
+
+        # a resource is a component of each composite its name ends with:
+        # looking up the suffixes of each name, instead of testing each name
+        # against each composite
+        if components:
+
+            for res in resources_meta:
+
+                for i in range(len(res)):
+
+                    if (suffix := res[i:]) in components:
+
+                        components[suffix].add(res)
 
         for res, comp in components.items():
 
-            self._resources_meta[res]['components'] = comp
+            resources_meta[res]['components'] = comp
 
-        self._resources_meta = dict(self._resources_meta)
+        return dict(resources_meta)
+
+
+    def _update_resources(self):
+        """
+        Compiles list of all the different resources across all databases.
+        """
+
+        _log('Updating resource information.')
+
+        self._resources_meta = self._disk_cached(
+            'resources_meta',
+            (*sorted(self.data_query_types), 'licenses'),
+            self._collect_resources_meta,
+        )
+
+        # inverted indices for the `databases` endpoint, so it does not
+        # have to scan all resources for each dataset on every request
+        self._resources_by_dataset = collections.defaultdict(set)
+        self._resources_by_query = collections.defaultdict(set)
+
+        for res, info in self._resources_meta.items():
+
+            for dataset in info['datasets']:
+
+                self._resources_by_dataset[dataset].add(res)
+
+            for query_type in info['queries']:
+
+                self._resources_by_query[query_type].add(res)
+
+        self._resources_by_dataset = dict(self._resources_by_dataset)
+        self._resources_by_query = dict(self._resources_by_query)
+
+        self._update_license_enables()
+        self._reset_resources_caches()
 
         _log('Finished updating resource information.')
 
@@ -1164,7 +1779,7 @@ class LegacyService:
         Replaces arguments with their synonyms.
         """
 
-        syn2arg = self.query_param[query_type].get('syn2arg', {})
+        syn2arg = self._qp[query_type].syn2arg
 
         argnames = set(
             itertools.chain(
@@ -1247,16 +1862,26 @@ class LegacyService:
 
         args = self._array_args(args, query_type)
 
-        args = {
-            k: self._maybe_bool(v)
-            for k, v in args.items()
-            if v is not None
-        }
-        args['format'] = self._ensure_simple(args.get('format'))
-        args = {
-            k: self._ensure_type(v, k, query_type)
-            for k, v in args.items()
-        }
+        arg_types = self._qp[query_type].arg_types
+        clean = {}
+
+        # a single pass: dropping the empty ones, parsing booleans and types
+        for k, v in args.items():
+
+            if v is None:
+
+                continue
+
+            v = self._maybe_bool(v)
+
+            if k in arg_types:
+
+                v = self._ensure_type(v, k, query_type)
+
+            clean[k] = v
+
+        clean['format'] = self._ensure_simple(clean.get('format'))
+        args = clean
 
         _log(f'[_clean_args] - Returning with args: {_misc.dict_str(args)}')
 
@@ -1265,7 +1890,7 @@ class LegacyService:
 
     def _ensure_type(self, val: Any, name: str, query_type: QUERY_TYPES) -> Any:
 
-        typ = self.query_param[query_type].get('arg_types', {}).get(name)
+        typ = self._qp[query_type].arg_types.get(name)
 
         if typ is not None:
 
@@ -1294,7 +1919,15 @@ class LegacyService:
             `'true'`/`'false'` according to the value.
         """
 
-        if isinstance(val, _const.LIST_LIKE) and not isinstance(val, (str, bytes)):
+        if val.__class__ is bool:
+
+            return val
+
+        if isinstance(val, str):
+
+            return _BOOL_STR.get(val.lower(), val)
+
+        if isinstance(val, _const.LIST_LIKE) and not isinstance(val, bytes):
 
             items = list(val)
 
@@ -1306,11 +1939,7 @@ class LegacyService:
 
                     return parsed
 
-        if (bval := str(val).lower()) in _const.BOOLEAN_VALUES:
-
-            val = self._parse_bool_arg(bval)
-
-        return val
+        return _BOOL_STR.get(str(val).lower(), val)
 
 
     @staticmethod
@@ -1374,7 +2003,7 @@ class LegacyService:
 
         _log(f'[_array_args] - Starting with args: {_misc.dict_str(args)}')
 
-        array_args = self.query_param[query_type].get('array_args', set())
+        array_args = self._qp[query_type].array_args
 
         args = {
             k: (
@@ -1411,11 +2040,9 @@ class LegacyService:
         result = []
         bad_args = bad_args or dict()
 
-        ref = (
-            self.args_reference['resources']
-                if query_type == 'databases' else
-            self.args_reference[query_type]
-        )
+        ref = self._args_ref_sets[
+            'resources' if query_type == 'databases' else query_type
+        ]
 
         for arg, val in args.items():
 
@@ -1430,7 +2057,7 @@ class LegacyService:
                 val = int(val) if isinstance(val, str) and val.isdigit() else val
                 val = _misc.to_set(val)
 
-                unknowns = val - set(ref[arg])
+                unknowns = val - ref[arg]
 
                 if unknowns:
 
@@ -1467,51 +2094,57 @@ class LegacyService:
 
     def _query_type(self, query_type):
 
-        return (
-            self.query_type_synonyms[query_type]
-                if (
-                    hasattr(self, 'query_type_synonyms') and
-                    query_type in self.query_type_synonyms
-                ) else
-            query_type
-        )
+        return self.query_type_synonyms.get(query_type, query_type)
 
 
     def _dataset_sources(self, query_type: str | None = None):
         """
         Provides a dictionary mapping each dataset to their source databases
+
+        The result depends only on the resource metadata, hence it is built
+        once for each query type, with the databases already in sorted lists
+        as they are served; don't modify it.
         """
 
-        res = dict(list(self.resources(format='raw'))[0])
+        if query_type not in self._dataset_sources_cache:
 
-        # If query_type provided, filter for only those (otherwise all pass)
-        if query_type is not None:
+            self._dataset_sources_cache[query_type] = self._dict_set_to_list(
+                self._collect_dataset_sources(query_type),
+            )
 
-            res = {
-                k: v
-                for k, v in res.items()
-                if query_type in v['queries'].keys()
-            }
+        return self._dataset_sources_cache[query_type]
 
-        if query_type == 'interactions':
 
-            dsets = INTERACTION_DATASETS.__args__
-            types = INTERACTION_TYPES.__args__
-            dset2type = self.dataset2type
+    def _collect_dataset_sources(self, query_type: str | None = None):
+        """
+        Groups the source databases enabled by the default license by dataset
+        (interaction type for interactions, `'*'` for anything else).
+        """
+
+        enabled = self._license_enables(DEFAULT_LICENSE)
 
-            result = {t: set() for t in types}
+        if query_type == 'interactions':
+
+            result = {t: set() for t in INTERACTION_TYPES.__args__}
 
-            for dset in dsets:
+            for dset in INTERACTION_DATASETS.__args__:
 
-                result[dset2type[dset]].update({
-                    k for k, v in res.items() if dset in v['datasets']
-                })
+                result[self.dataset2type[dset]].update(
+                    self._resources_by_dataset.get(dset, set()) & enabled,
+                )
 
             return result
 
         else:
 
-            return {'*': set(res.keys())}
+            # If query_type provided, filter for only those (otherwise all pass)
+            res = (
+                self._resources_meta.keys()
+                    if query_type is None else
+                self._resources_by_query.get(query_type, set())
+            )
+
+            return {'*': set(res) & enabled}
 
 
     def databases(
@@ -1580,8 +2213,6 @@ class LegacyService:
                 f'query {query_type} or no such query available.'
             )
 
-        result = self._dict_set_to_list(result)
-
         fmt_value = lambda v: (
             ';'.join(str(x) for x in v)
                 if isinstance(v, (list, set, tuple)) else
@@ -1629,11 +2260,8 @@ class LegacyService:
 
         if query_type in self.args_reference:
 
-            result = {
-                    k:
-                    sorted(v) if isinstance(v, _const.LIST_LIKE) else v
-                for k, v in self.args_reference[query_type].items()
-            }
+            # values are sorted only at the end, only the ones returned
+            result = dict(self.args_reference[query_type])
 
             if query_type in self.data_query_types:
 
@@ -1746,7 +2374,9 @@ class LegacyService:
         yield from self._output(result, names = None, format = format, **kwargs)
 
 
-    def _schema(self, query_type: str) -> ReadOnlyColumnCollection:
+    @staticmethod
+    @functools.cache
+    def _schema(query_type: str) -> ReadOnlyColumnCollection:
         """
         Retrieves the schema class of the corresponding query type (e.g.
         `Interactions`, `Enzsub`, `Annotations`, etc.).
@@ -1842,9 +2472,12 @@ class LegacyService:
         return op, val
 
 
-    def _isarray(self, col: InstrumentedAttribute) -> bool:
+    @staticmethod
+    @functools.cache
+    def _isarray(col: InstrumentedAttribute) -> bool:
         """
-        Checks whether a given column is array type.
+        Checks whether a given column is array type. The schema is static,
+        so the answer is memoized for each column.
 
         Args:
             col:
@@ -1857,7 +2490,13 @@ class LegacyService:
         return col.type.python_type is list
 
 
-    def _where(self, query: Query, args: dict, query_type: str) -> Query:
+    def _where(
+            self,
+            query: Query,
+            args: dict,
+            query_type: str,
+            extra_where: Iterable | None = None,
+    ) -> Query:
         """
         Adds `WHERE` clauses to the query instance.
 
@@ -1869,47 +2508,48 @@ class LegacyService:
                 search (argument name/value pairs).
              query_type:
                 The target database name for the query (e.g. `'intercell`).
+             extra_where:
+                Further clauses, built outside of this method (`None` items
+                are ignored).
 
         Returns:
             The updated query instance with the `WHERE` clauses added according
             to the arguments.
         """
 
-        param = self.query_param[query_type].get('where', {})
-        synonyms = self.query_param[query_type].get('where_synonyms', {})
-        columns = self._columns(query_type)
+        plan = self._where_plan[query_type]
+        synonyms = self._qp[query_type].where_synonyms
+        where = []
 
-        # Adding WHERE clauses
+        # Collecting WHERE clauses
         for key, value in args.items():
 
             # If key has synonym, get long version, otherwise, keep as it is
             key = synonyms.get(key, key)
 
-            if col_op := param.get(key, None):
-
-                value = self._parse_arg(value)
-                cols, *op = _misc.to_tuple(col_op) + (None,)
-
-                where_expr = []
+            if not (cols_op := plan.get(key)):
 
-                for col in cols.split(':'):
-
-                    col = columns[col]
-                    op, value = self._where_op(col, value, op[0])
-
-                    if op == 'NOT':
-
-                        expr = not_(col)
-
-                    else:
+                continue
 
-                        expr = col.op(op)(value)
+            cols, op = cols_op
+            # the columns of one argument have the same type: the operator
+            # and the (possibly array) value are the same for all
+            op, value = self._where_op(cols[0], self._parse_arg(value), op)
+            where.append(or_(*(
+                not_(col) if op == 'NOT' else col.op(op)(value)
+                for col in cols
+            )))
 
-                    where_expr.append(expr)
+        if extra_where := [
+            w
+            for w in _misc.to_list(extra_where)
+            if w is not None
+        ]:
 
-                query = query.filter(or_(*where_expr))
+            where.append(and_(*extra_where))
 
-        return query
+        # one `filter` call instead of a new Query object for each clause
+        return query.filter(*where) if where else query
 
 
     def _select(self, args: dict, query_type: str) -> Query:
@@ -1930,20 +2570,19 @@ class LegacyService:
 
         param = self.query_param[query_type]
         synonyms = param.get('select', {})
-        cols = param.get(
+        cols = set(param.get(
             'select_default',
-            {c.name for c in self._columns(query_type)},
-        ).copy()
+            self._column_by_name[query_type],
+        ))
 
         _log(f'[_select] Columns are: {cols}')
 
-        tbl = self._schema(query_type)
         query_fields = set()
 
         fields_arg = set(self._parse_arg(args.get('fields', None)))
         fields_arg |= {
             f
-            for f in param.get('select_args', set())
+            for f in param.get('select_args', ())
             if args.get(f, False)
         }
 
@@ -1952,11 +2591,7 @@ class LegacyService:
             query_fields |= _misc.to_set(synonyms.get(query_field, query_field))
 
         cols.update(_misc.to_set(query_fields))
-        select = [
-            c
-            for c in tbl.__table__.columns
-            if c.name != 'id' and (not cols or c.name in cols)
-        ]
+        select = self._select_columns(query_type, frozenset(cols))
 
         _log(f'[_select] - select values are: {[c.name for c in select]}')
 
@@ -1964,6 +2599,31 @@ class LegacyService:
         return self.con.session.query(*select)
 
 
+    @staticmethod
+    @functools.lru_cache(maxsize = 256)
+    def _select_columns(query_type: str, cols: frozenset[str]) -> tuple:
+        """
+        The columns to select, in the order of the table. Clients request
+        the same few column sets over and over, so the recent ones are
+        memoized.
+
+        Args:
+            query_type:
+                The target database name for the query (e.g. `'intercell'`).
+            cols:
+                Names of the columns to select; all columns if empty.
+
+        Returns:
+            The selected columns, except the `id` column.
+        """
+
+        return tuple(
+            c
+            for c in LegacyService._schema(query_type).__table__.columns
+            if c.name != 'id' and (not cols or c.name in cols)
+        )
+
+
     def _limit(self, query: Query, args: dict) -> Query:
         """
         Adds `LIMIT` clauses to the query instance.
@@ -2022,17 +2682,12 @@ class LegacyService:
             query = self._select(args, query_type)
             _log(f'[_query] - Post-query select call {_misc.dict_str(args)}')
 
-            query = self._where(query, args, query_type)
-
-            if extra_where := [
-                w
-                for w in _misc.to_list(extra_where)
-                if w is not None
-            ]:
-
-                extra_where = and_(*extra_where)
-                query = query.filter(extra_where)
-
+            query = self._where(
+                query,
+                args,
+                query_type,
+                extra_where = extra_where,
+            )
             query = self._limit(query, args)
 
             # TODO: reimplement and enable license filtering
@@ -2054,14 +2709,15 @@ class LegacyService:
                 Not used.
 
         Yields:
-            Tuples with the response rows.
+            The response rows, as SQLAlchemy `Row` objects: these are
+            sequences that support everything done with the rows downstream,
+            so they are not copied into tuples.
         """
 
         _log(f'[_execute] - Executing query: {query}')
 
-        for row in self.con.execute(query):
-
-            yield tuple(row)
+        # the connection fetches the rows in chunks already
+        yield from self.con.execute(query)
 
 
     def _request(
@@ -2133,12 +2789,15 @@ class LegacyService:
 
         _log(f'[_request] - Args: {_misc.dict_str(args)}')
 
-
         if format == 'query':
 
-            result = ((query,),)
+            # Only the query object is requested: nothing to execute, filter
+            # or format, so skip the output pipeline altogether
+            yield (query,)
 
-        elif query:
+            return
+
+        if query:
 
             result = self._execute(query)
             colnames = [c.name for c in query.statement.selected_columns]
@@ -2155,22 +2814,35 @@ class LegacyService:
 
             if fields_to_remove:
 
-                idx = [i for i, c in enumerate(colnames) if c in fields_to_remove]
-                colnames = [c for i, c in enumerate(colnames) if i not in idx]
-                result = (
-                    tuple(r[i] for i in range(len(r)) if i not in idx)
-                    for r in result
+                # the removed columns are selected only for the license
+                # filter above, so they can not be left out of the query;
+                # dropping them by a C level getter is cheaper than rebuilding
+                # the tuples in Python
+                keep = [
+                    i
+                    for i, c in enumerate(colnames)
+                    if c not in fields_to_remove
+                ]
+                colnames = [colnames[i] for i in keep]
+                getter = (
+                    operator.itemgetter(*keep)
+                        if len(keep) > 1 else
+                    lambda r: tuple(r[i] for i in keep)
                 )
+                result = map(getter, result)
 
             if callable(postprocess):
 
-                result = (postprocess(rec, **kwargs) for rec in result)
+                # bind kwargs once instead of unpacking them for each record
+                result = map(functools.partial(postprocess, **kwargs), result)
 
         else:
 
             result = ((bad_req,),)
 
-        header = args.get('header', True) if header is None else header
+        header = self._parse_bool_arg(
+            args.get('header', True) if header is None else header,
+        )
         names = colnames if header or format in {'raw', 'json'} else None
 
         yield from self._output(
@@ -2214,7 +2886,10 @@ class LegacyService:
 
         if callable(postformat):
 
-            result = (postformat(*rec, **kwargs) for rec in with_last(result))
+            result = itertools.starmap(
+                functools.partial(postformat, **kwargs),
+                with_last(result),
+            )
 
         postcontent = () if postcontent is None else postcontent
         precontent = () if precontent is None else precontent
@@ -2252,8 +2927,7 @@ class LegacyService:
 
             if names:
 
-                record = collections.namedtuple('Record', names)
-                formatter = lambda x: record(*x)
+                formatter = _record_cls(tuple(names))._make
 
             for rec in result:
 
@@ -2263,17 +2937,15 @@ class LegacyService:
 
             if names:
 
-                formatter = lambda x: dict(
-                    zip(
-                        names, [
-                            sorted(e) if isinstance(e, set) else e for e in x
-                        ],
-                    ),
-                )
+                formatter = lambda x: dict(zip(names, x))
+
+            # sets are not JSON serializable: the encoder calls `default`
+            # only for these, instead of us checking each field
+            dumps = functools.partial(json.dumps, default = sorted)
 
             for rec in result:
 
-                yield json.dumps(formatter(rec))
+                yield dumps(formatter(rec))
 
         elif format == 'query': # Returns the SQL query text
 
@@ -2331,16 +3003,37 @@ class LegacyService:
         def get_formatter(name):
 
             sep = cls._get_array_sep(query_type, name)
+            join = lambda field: sep.join(map(str, field))
+            # exact type dispatch: one dict lookup per field on the hot path,
+            # the isinstance chain below only runs for subclasses and exotic
+            # list-like types; scalars (numbers, flags and NULLs) are as
+            # frequent as strings in the tables
+            dispatch = {
+                str: str,
+                int: str,
+                float: str,
+                bool: str,
+                type(None): str,
+                list: join,
+                tuple: join,
+                set: join,
+                frozenset: join,
+                dict: json.dumps,
+            }
 
             def formatter(field):
 
-                return (
-                    json.dumps(field)
-                        if isinstance(field, dict) else
-                    sep.join(str(f) for f in field)
-                        if isinstance(field, _const.LIST_LIKE) else
-                    str(field)
-                )
+                if (fmt := dispatch.get(type(field))) is None:
+
+                    fmt = (
+                        json.dumps
+                            if isinstance(field, dict) else
+                        join
+                            if isinstance(field, _const.LIST_LIKE) else
+                        str
+                    )
+
+                return fmt(field)
 
             return formatter
 
@@ -2503,7 +3196,30 @@ class LegacyService:
         """
 
         organisms = organisms or {9606}
-        args = locals()
+        args = {
+            'resources': resources,
+            'partners': partners,
+            'sources': sources,
+            'targets': targets,
+            'fields': fields,
+            'limit': limit,
+            'format': format,
+            'source_target': source_target,
+            'organisms': organisms,
+            'datasets': datasets,
+            'dorothea_levels': dorothea_levels,
+            'dorothea_methods': dorothea_methods,
+            'types': types,
+            'directed': directed,
+            'signed': signed,
+            'loops': loops,
+            'entity_types': entity_types,
+            'evidences': evidences,
+            'genesymbols': genesymbols,
+            'extra_attrs': extra_attrs,
+            'license': license,
+            'kwargs': kwargs,
+        }
         args = self._clean_args(args, 'interactions')
 
         args = self._interactions_defaults(args)
@@ -2518,7 +3234,7 @@ class LegacyService:
         _log(f'[interactions] - Interactions where: {extra_where},'
              f'{where_bool}, {where_loops}')
 
-        yield from self._request(
+        return self._request(
             args,
             query_type = 'interactions',
             extra_where = [extra_where, where_bool, where_loops],
@@ -2526,12 +3242,32 @@ class LegacyService:
         )
 
     @staticmethod
-    def _inject_fields(args):
+    def _inject_fields(args, license: LICENSE_LEVELS | None = None):
+        """
+        Adds the columns needed by the license filter to the selected
+        fields, and marks the ones not requested for removal.
+
+        Args:
+            args:
+                The query arguments.
+            license:
+                License level set by the server, never the `license` of the
+                request arguments: clients must not be able to switch off the
+                license filter.
+        """
 
         req_fields = _misc.to_set(args.pop('fields', None))
-        use_fields = req_fields | {'sources', 'references'}
+        license_cols = {'sources', 'references'}
+        license = LegacyService._query_license_level(license)
+        # the license filter needs these columns; if it doesn't run, don't
+        # select them just to drop them later
+        use_fields = (
+            req_fields
+                if license == LICENSE_IGNORE else
+            req_fields | license_cols
+        )
         args['fields'] = use_fields
-        args['fields_to_remove'] = use_fields - req_fields
+        args['fields_to_remove'] = license_cols - req_fields
 
         return args
 
@@ -2551,7 +3287,8 @@ class LegacyService:
                 The query arguments.
 
         Returns:
-            The boolean variable clause (multiple ones joined by and operator).
+            The boolean variable clause (multiple ones joined by and operator),
+            `None` if no boolean argument applies.
         """
 
         def _override(col):
@@ -2582,29 +3319,27 @@ class LegacyService:
             return expr
 
 
-        override = self.query_param[query_type].get('where_bool_override', {})
-        in_override = {arg for key in override.values() for arg in key.keys()}
-        override_expr = {}
+        if not (plan := self._where_bool_plan.get(query_type)):
 
-        bool_args = self.query_param[query_type].get('where_bool', {})
-        columns = self._columns(query_type)
+            return None
 
+        bool_args, override, in_override, columns = plan
+        override_expr = {}
         where = []
 
-        for arg, cols in bool_args.items():
+        for arg, cols_map, valid_cols in bool_args:
 
             arg_cols = _misc.to_set(args.get(arg, set()))
 
-            if isinstance(cols, dict):
+            if cols_map:
 
-                arg_cols = {cols.get(x, x) for x in arg_cols}
-                cols = set(cols.values())
+                arg_cols = {cols_map.get(x, x) for x in arg_cols}
 
             if arg == 'signed' and True in arg_cols:
 
                 arg_cols = {'is_stimulation', 'is_inhibition'}
 
-            if (cols := arg_cols & cols):
+            if (cols := arg_cols & valid_cols):
 
                 expr = or_(*(_override(col) for col in sorted(cols)))
 
@@ -2616,7 +3351,9 @@ class LegacyService:
 
                     where.append(expr)
 
-        return and_(True, *where)
+        # no `and_(True, ...)`: without any clause that would add a
+        # `WHERE true` to the query
+        return and_(*where) if where else None
 
 
     def enzsub(
@@ -2685,7 +3422,24 @@ class LegacyService:
         """
 
         organisms = organisms or {9606}
-        args = locals()
+        args = {
+            'resources': resources,
+            'partners': partners,
+            'enzymes': enzymes,
+            'substrates': substrates,
+            'types': types,
+            'residues': residues,
+            'fields': fields,
+            'limit': limit,
+            'format': format,
+            'enzyme_substrate': enzyme_substrate,
+            'modification': modification,
+            'organisms': organisms,
+            'loops': loops,
+            'genesymbols': genesymbols,
+            'license': license,
+            'kwargs': kwargs,
+        }
         args = self._clean_args(args, 'enzsub')
         where_loops = self._where_loops('enzsub', args)
         extra_where = self._where_partners('enzsub', args)
@@ -2695,7 +3449,7 @@ class LegacyService:
         _log(f'[enzsub] - Args: {_misc.dict_str(args)}')
         _log(f'[enzsub] - Enzsub where: {extra_where}, {where_loops}')
 
-        yield from self._request(
+        return self._request(
             args,
             query_type = 'enzsub',
             extra_where = [extra_where, where_loops],
@@ -2747,7 +3501,7 @@ class LegacyService:
 
         q_str = str(self._query_sqla(query_type, **kwargs))
 
-        return re.sub(r'\s+', ' ', q_str)
+        return ' '.join(q_str.split())
 
 
     def _where_loops(
@@ -2768,14 +3522,9 @@ class LegacyService:
             The loops variable WHERE clause.
         """
 
-        sides = self.query_param[query_type]['where_partners']['sides']
-        columns = self._columns(query_type)
-
         if not args.get('loops', False):
 
-            cols = [columns[side] for side in sides.values()]
-
-            return cols[0].op('!=')(cols[1])
+            return self._loops_clause[query_type]
 
 
     def _where_partners(
@@ -2798,34 +3547,31 @@ class LegacyService:
             specified operator in `args` otherwise, defaults to and).
         """
 
-        sides = self.query_param[query_type]['where_partners']['sides']
-        query_op = self.query_param[query_type]['where_partners']['operator']
+        query_op, sides = self._partners_plan[query_type]
 
-        for side in sides:
+        for side, _ in sides:
 
             args[side] = args.get(side, None) or args.get('partners', None)
 
-        columns = self._columns(query_type)
-
         partners_where = []
+        # the side columns all have the same type, so the operator and the
+        # (possibly array) value are built only once for each distinct value;
+        # with `partners` both sides share one
+        where_ops = {}
 
-        for side, sidecol in sides.items():
-
-            conditions = []
+        for side, cols in sides:
 
             # Skip if nothing is provided
-            if not args[side]:
+            if not (value := args[side]):
 
                 continue
 
-            for suffix in ('', '_genesymbol'):
+            if (op_val := where_ops.get(id(value))) is None:
 
-                col = columns[f'{sidecol}{suffix}']
-                op, val = self._where_op(col, args[side])
-                expr = col.op(op)(val)
-                conditions.append(expr)
+                op_val = where_ops[id(value)] = self._where_op(cols[0], value)
 
-            partners_where.append(or_(*conditions))
+            op, val = op_val
+            partners_where.append(or_(*(col.op(op)(val) for col in cols)))
 
         if len(partners_where) == 1:
 
@@ -2880,12 +3626,21 @@ class LegacyService:
             format.
         '''
 
-        args = locals()
+        args = {
+            'resources': resources,
+            'proteins': proteins,
+            'entity_types': entity_types,
+            'fields': fields,
+            'limit': limit,
+            'format': format,
+            'license': license,
+            'kwargs': kwargs,
+        }
         args = self._clean_args(args, 'annotations')
 
         _log(f'[annotations] - Args: {_misc.dict_str(args)}')
 
-        yield from self._request(
+        return self._request(
             args,
             query_type = 'annotations',
             **kwargs,
@@ -2906,37 +3661,37 @@ class LegacyService:
 
         kwargs.pop('bad_args', None)
 
-        args = locals()
+        args = {
+            'resources': resources,
+            'cytoscape': cytoscape,
+            'format': format,
+            'kwargs': kwargs,
+        }
         args = self._clean_args(args, 'annotations', new_query=False)
         format = self._ensure_simple(format)
 
-        renum = re.compile(r'(?:[-\d\.]+|nan|-?inf)')
-
-        summary = {
-            (
-                row[:-1] + ('<numeric>',)
-                if all([re.match(renum, val) for val in row[-1]])
-                else row[:-1] + ('#'.join(row[-1]),)
-            )
-            for row in self._cached_data["annotations_summary"]
-        }
+        summary = self._summary(
+            'annotations_summary',
+            self._preprocess_annotations,
+        )
 
+        # the cached summary is unique already: the filters are applied
+        # lazily, as the records are streamed
         if 'resources' in args:
 
-            summary = {
-                row for row in summary
-                if row[0] in args['resources']
-            }
+            resources = _misc.to_set(args['resources'])
+            summary = (row for row in summary if row[0] in resources)
 
         if args['cytoscape']:
 
-            summary = {
+            labels = set(self.cytoscape_attributes.values())
+            summary = (
                 row for row in summary
                 if (
-                    row[0] in self.cytoscape_attributes.keys()
-                    and row[1] in self.cytoscape_attributes.values()
+                    row[0] in self.cytoscape_attributes and
+                    row[1] in labels
                 )
-            }
+            )
 
         yield from self._output(
             summary,
@@ -3044,7 +3799,33 @@ class LegacyService:
             format.
         '''
 
-        args = locals()
+        args = {
+            'resources': resources,
+            'proteins': proteins,
+            'entity_types': entity_types,
+            'aspect': aspect,
+            'scope': scope,
+            'source': source,
+            'categories': categories,
+            'parent': parent,
+            'transmitter': transmitter,
+            'trans': trans,
+            'receiver': receiver,
+            'rec': rec,
+            'secreted': secreted,
+            'sec': sec,
+            'plasma_membrane_transmembrane': plasma_membrane_transmembrane,
+            'pmtm': pmtm,
+            'plasma_membrane_peripheral': plasma_membrane_peripheral,
+            'pmp': pmp,
+            'fields': fields,
+            'limit': limit,
+            'format': format,
+            'topology': topology,
+            'causality': causality,
+            'license': license,
+            'kwargs': kwargs,
+        }
         args = self._clean_args(args, 'intercell')
 
         where_bool = self._where_bool('intercell', args)
@@ -3052,7 +3833,7 @@ class LegacyService:
         _log(f'[intercell] - Args: {_misc.dict_str(args)}')
         _log(f'[intercell] - Intercell where: {where_bool}')
 
-        yield from self._request(
+        return self._request(
             args,
             query_type = 'intercell',
             extra_where = [where_bool],
@@ -3079,28 +3860,39 @@ class LegacyService:
 
         kwargs.pop('bad_args', None)
 
-        args = locals()
+        args = {
+            'aspect': aspect,
+            'source': source,
+            'scope': scope,
+            'transmitter': transmitter,
+            'receiver': receiver,
+            'parent': parent,
+            'resources': resources,
+            'format': format,
+            'kwargs': kwargs,
+        }
         args = self._clean_args(args, 'intercell', new_query=False)
         format = self._ensure_simple(format)
 
-        result = self._cached_data["intercell_summary"]
-
-        for var in (
-            'aspect',
-            'source',
-            'scope',
-            'transmitter',
-            'receiver',
-            'parent',
-            'resources',
-        ):
-
-            if values := args.get(var):
+        # argument name -> record field
+        filters = tuple(
+            (field, frozenset(_misc.to_set(values)))
+            for var, field in (
+                ('aspect', 'aspect'),
+                ('source', 'source'),
+                ('scope', 'scope'),
+                ('transmitter', 'transmitter'),
+                ('receiver', 'receiver'),
+                ('parent', 'parent'),
+                ('resources', 'database'),
+            )
+            if (values := args.get(var))
+        )
 
-                result = [x for x in result if getattr(x, var) in values]
+        self._summary('intercell_summary', self._preprocess_intercell)
 
         yield from self._output(
-            ((x.category, x.parent, x.database) for x in result),
+            self._intercell_summary_filtered(filters),
             names = ['category', 'parent', 'database'],
             format = format,
             **kwargs,
@@ -3145,10 +3937,18 @@ class LegacyService:
             format.
         """
 
-        args = locals()
+        args = {
+            'resources': resources,
+            'proteins': proteins,
+            'fields': fields,
+            'limit': limit,
+            'format': format,
+            'license': license,
+            'kwargs': kwargs,
+        }
         args = self._clean_args(args, 'complexes')
 
-        yield from self._request(args, 'complexes', **kwargs)
+        return self._request(args, 'complexes', **kwargs)
 
 
     def resources(
@@ -3167,9 +3967,33 @@ class LegacyService:
         }
 
         license = self._query_license_level(license)
+        datasets = frozenset(datasets)
+
+        if format == 'raw':
+
+            result = (self._resources_filtered(license, datasets),)
+
+        else:
+
+            result = (self._resources_json(license, datasets),)
+
+        yield from result
+
+
+    def _filter_resources(
+            self,
+            license: LICENSE_LEVELS,
+            datasets: frozenset[str],
+    ) -> dict[str, dict]:
+        """
+        Resource metadata enabled by a license level, optionally limited to
+        datasets or query types. Memoized by `_resources_filtered` (until the
+        resources are updated).
+        """
+
         resources_enabled = self._license_enables(license)
 
-        result = {
+        return {
             k: v
             for k, v in self._resources_meta.items()
             if (
@@ -3177,20 +4001,29 @@ class LegacyService:
                 (
                     not datasets or
                     datasets & v['datasets'] or
-                    datasets & set(v['queries'].keys())
+                    datasets & v['queries'].keys()
                 )
             )
         }
 
-        if format == 'raw':
-
-            result = (result,)
-
-        else:
 
-            result = (json.dumps(result, cls=SetEncoder) + os.linesep,)
+    def _dump_resources(
+            self,
+            license: LICENSE_LEVELS,
+            datasets: frozenset[str],
+    ) -> str:
+        """
+        The filtered resource metadata as a JSON line. Memoized by
+        `_resources_json`.
+        """
 
-        yield from result
+        return (
+            json.dumps(
+                self._resources_filtered(license, datasets),
+                cls = SetEncoder,
+            ) +
+            os.linesep
+        )
 
 
     def about(self, **kwargs):
@@ -3224,16 +4057,40 @@ class LegacyService:
         Checks the prefix
         """
 
-        return name.split(":", maxsplit = 1)[0]
+        # the names are references (`resource:id`), nearly all distinct:
+        # memoizing would not pay off, but `partition` builds no list
+        return name.partition(':')[0]
 
 
-    @functools.cache
-    def _license_enables(self, license: LICENSE_LEVELS) -> set[str]:
+    def _license_enables(self, license: LICENSE_LEVELS) -> frozenset[str]:
         """
-        TODO
+        Resources enabled by a license level, as precomputed by
+        `_update_license_enables`.
+        """
+
+        return self._license_enabled[self._query_license_level(license)]
+
+
+    def _update_license_enables(self):
+        """
+        Compiles the set of enabled resources for each license level, so
+        requests only look them up.
+        """
+
+        self._license_enabled = {
+            license: self._collect_license_enables(license)
+            for license in LICENSE_LEVELS.__args__
+        }
+
+
+    def _collect_license_enables(
+            self,
+            license: LICENSE_LEVELS,
+    ) -> frozenset[str]:
+        """
+        Resources enabled by a license level, based on the resource metadata.
         """
 
-        license = self._query_license_level(license)
         rank = LICENSE_RANKS[license]
 
         enabled = {
@@ -3242,18 +4099,30 @@ class LegacyService:
             if LICENSE_RANKS[info['license']['purpose']] <= rank
         }
 
-        enabled |= {
-            resource
+        composites = {
+            resource: info['components']
             for resource, info in self._resources_meta.items()
+            if info['license']['purpose'] == 'composite'
+        }
+
+        # a composite can be the component of another one: repeat until no
+        # more composites are enabled
+        while new := {
+            resource
+            for resource, components in composites.items()
             if (
-                info['license']['purpose'] == 'composite' and
-                any(comp in enabled for comp in info['components'])
+                resource not in enabled and
+                any(comp in enabled for comp in components)
             )
-        }
+        }:
+
+            enabled |= new
 
+        # the lower case names are kept along the original ones: the
+        # filter tests the values as they are, without case conversion
         enabled |= {res.lower() for res in enabled}
 
-        return enabled
+        return frozenset(enabled)
 
 
     def _license_filter(
@@ -3264,16 +4133,24 @@ class LegacyService:
             license: LICENSE_LEVELS | None = None,
     ):
 
-        def filter_resources(res, prefix = False):
+        def filter_prefixed(res):
 
-            pref = self._prefix if prefix else lambda x: x
+            if not res:
 
-            if isinstance(res, str):
-                if pref(res) in enabled_resources:
-                    return res
+                return ''
 
-            else:
-                return {r for r in res if pref(r) in enabled_resources}
+            if ';' not in res:
+
+                # a single reference: no list to build and join
+                return res if prefix(res) in enabled_resources else ''
+
+            # single pass, keeping the original order (dropping duplicates)
+            return ';'.join(
+                dict.fromkeys(
+                    r for r in res.split(';')
+                    if prefix(r) in enabled_resources
+                ),
+            )
 
         _log('Applying license filtering level: %s' % license)
 
@@ -3288,8 +4165,14 @@ class LegacyService:
         else:
 
             enabled_resources = self._license_enables(license)
+            prefix = self._prefix
 
-            res_col = cols.index(self._resource_col(query_type))
+            res_colname = self._resource_col(query_type)
+            res_col = cols.index(res_colname)
+            # scalar or array column: decided once, not for each record
+            res_array = self._isarray(
+                self._column_by_name[query_type][res_colname],
+            )
             prefix_cols_idx = [
                 cols.index(i) for i in self._resource_prefix_cols(query_type)
             ]
@@ -3297,25 +4180,56 @@ class LegacyService:
             before = 0
             after = 0
 
+            # records are copied only if some field has to be rewritten;
+            # with a scalar resource column and no prefixed columns
+            # (annotations, intercell) they pass through as they are
+            rewrite = res_array or bool(prefix_cols_idx)
+            # the same few resource combinations recur across the records:
+            # each distinct one is filtered only once per request
+            filtered = {}
+
             for rec in records:
 
                 before += 1
-                rec = list(rec)
-                rec[res_col] = filter_resources(rec[res_col])
 
-                if not rec[res_col]:
+                if res_array:
+
+                    # tuple in database order: same ordering as the unfiltered
+                    # output, no set building and no sorting downstream
+                    key = tuple(rec[res_col])
+
+                    if (res := filtered.get(key)) is None:
+
+                        res = filtered[key] = tuple(
+                            r for r in key
+                            if r in enabled_resources
+                        )
+
+                    if not res:
+
+                        continue
+
+                elif rec[res_col] not in enabled_resources:
 
                     continue
 
-                for c in prefix_cols_idx:
+                if rewrite:
+
+                    rec = list(rec)
+
+                    if res_array:
+
+                        rec[res_col] = res
 
-                    rec[c] = rec[c].split(';') if rec[c] else ()
-                    rec[c] = filter_resources(rec[c], prefix = True)
-                    rec[c] = ';'.join(rec[c])
+                    for c in prefix_cols_idx:
+
+                        rec[c] = filter_prefixed(rec[c])
+
+                    rec = tuple(rec)
 
                 after += 1
 
-                yield tuple(rec)
+                yield rec
 
             _log(
                 f'Parsed {before} records, '
@@ -3381,29 +4295,29 @@ class LegacyService:
             argument.
         """
 
+        if arg.__class__ is bool:
+
+            return arg
+
         if isinstance(arg, list) and arg:
 
             arg = arg[0]
 
-        if hasattr(arg, 'decode'):
+        if isinstance(arg, bytes):
 
             arg = arg.decode('utf-8')
 
-        if hasattr(arg, 'lower'):
+        if isinstance(arg, str):
 
             arg = arg.lower()
 
-        if hasattr(arg, 'isdigit') and arg.isdigit():
-
-            arg = int(arg)
+            if (value := _BOOL_STR.get(arg)) is not None:
 
-        if arg in _const.BOOLEAN_FALSE:
+                return value
 
-            arg = False
+            if arg.isdigit():
 
-        if arg in _const.BOOLEAN_TRUE:
-
-            arg = True
+                arg = int(arg)
 
         return bool(arg)
 
@@ -3417,15 +4331,11 @@ def with_last(iterable: Iterable[Any]) -> Generator[Any, bool]:
         only at the last element.
     """
 
-    itr = iter(iterable)
-    prev = next(itr, None)
-
-    if prev is not None:
-
-        for it in itr:
-
-            yield prev, False
+    this, ahead = itertools.tee(iterable)
+    # a private sentinel, so `None` items are passed through as any other
+    end = object()
+    next(ahead, end)
 
-            prev = it
+    for it, nxt in itertools.zip_longest(this, ahead, fillvalue = end):
 
-        yield prev, True
+        yield it, nxt is end
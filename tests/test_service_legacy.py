@@ -20,26 +20,25 @@ def test_clean_args_converts_boolean_sequences(legacy_service):
 WHERE_CASES2 = { # XXX: Attempting systematic testing of all arguments
     'interactions': [
         (
-            # XXX: Adds "AND true" clause in the query for some reason
             {'resources': ['SIGNOR']},
             'interactions.sources && %(sources_1)s::VARCHAR[]',
         ),
         (
             {'partners': ['EGFR']},
             'interactions.source = ANY (ARRAY[%(param_2)s])) OR '
-            '(interactions.source_genesymbol = ANY (ARRAY[%(param_3)s])) OR '
-            '(interactions.target = ANY (ARRAY[%(param_4)s])) OR '
-            '(interactions.target_genesymbol = ANY (ARRAY[%(param_5)s]',
+            '(interactions.source_genesymbol = ANY (ARRAY[%(param_2)s])) OR '
+            '(interactions.target = ANY (ARRAY[%(param_2)s])) OR '
+            '(interactions.target_genesymbol = ANY (ARRAY[%(param_2)s]',
         ),
         (
             {'sources': ['EGFR']},
             'interactions.source = ANY (ARRAY[%(param_2)s])) OR '
-            '(interactions.source_genesymbol = ANY (ARRAY[%(param_3)s]',
+            '(interactions.source_genesymbol = ANY (ARRAY[%(param_2)s]',
         ),
         (
             {'targets': ['EGFR']},
             'interactions.target = ANY (ARRAY[%(param_2)s])) OR '
-            '(interactions.target_genesymbol = ANY (ARRAY[%(param_3)s]',
+            '(interactions.target_genesymbol = ANY (ARRAY[%(param_2)s]',
         ),
         (
             {'datasets': ['collectri', 'omnipath']},
@@ -158,10 +157,10 @@ WHERE_CASES = {
             {'enzymes': 'P06239', 'substrates': 'O14543', 'limit': 10},
             "(enzsub.ncbi_tax_id = ANY (ARRAY[%(param_1)s])) AND "
             "((enzsub.enzyme = ANY (ARRAY[%(param_2)s])) OR "
-            "(enzsub.enzyme_genesymbol = ANY (ARRAY[%(param_3)s])) OR "
-            "(enzsub.substrate = ANY (ARRAY[%(param_4)s])) OR "
-            "(enzsub.substrate_genesymbol = ANY (ARRAY[%(param_5)s]))) "
-            "AND (enzsub.enzyme != enzsub.substrate) LIMIT %(param_6)s",
+            "(enzsub.enzyme_genesymbol = ANY (ARRAY[%(param_2)s])) OR "
+            "(enzsub.substrate = ANY (ARRAY[%(param_3)s])) OR "
+            "(enzsub.substrate_genesymbol = ANY (ARRAY[%(param_3)s]))) "
+            "AND (enzsub.enzyme != enzsub.substrate) LIMIT %(param_4)s",
         ),
         (
             # multiple enzymes
@@ -169,8 +168,8 @@ WHERE_CASES = {
             "(enzsub.ncbi_tax_id = ANY (ARRAY[%(param_1)s])) AND "
             "((enzsub.enzyme = ANY (ARRAY[%(param_2)s, %(param_3)s])) OR "
             "(enzsub.enzyme_genesymbol = "
-            "ANY (ARRAY[%(param_4)s, %(param_5)s]))) AND "
-            "(enzsub.enzyme != enzsub.substrate) LIMIT %(param_6)s",
+            "ANY (ARRAY[%(param_2)s, %(param_3)s]))) AND "
+            "(enzsub.enzyme != enzsub.substrate) LIMIT %(param_4)s",
         ),
         (
             # enzyme AND substrate (instead of default OR)
@@ -182,10 +181,10 @@ WHERE_CASES = {
             },
             "(enzsub.ncbi_tax_id = ANY (ARRAY[%(param_1)s])) AND "
             "((enzsub.enzyme = ANY (ARRAY[%(param_2)s])) OR "
-            "(enzsub.enzyme_genesymbol = ANY (ARRAY[%(param_3)s]))) "
-            "AND ((enzsub.substrate = ANY (ARRAY[%(param_4)s])) OR "
-            "(enzsub.substrate_genesymbol = ANY (ARRAY[%(param_5)s]))) "
-            "AND (enzsub.enzyme != enzsub.substrate) LIMIT %(param_6)s",
+            "(enzsub.enzyme_genesymbol = ANY (ARRAY[%(param_2)s]))) "
+            "AND ((enzsub.substrate = ANY (ARRAY[%(param_3)s])) OR "
+            "(enzsub.substrate_genesymbol = ANY (ARRAY[%(param_3)s]))) "
+            "AND (enzsub.enzyme != enzsub.substrate) LIMIT %(param_4)s",
         ),
         (
             {'organisms': 10090},